@@ -4,8 +4,18 @@ CellRepair.AI LangChain Integration
 Connect any LLM to 4882 autonomous AI agents.
 """
 
-from .cellrepair_langchain_tool import CellRepairTool, create_cellrepair_tool
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .cellrepair_langchain_tool import CellRepairTool, create_cellrepair_tool
 
 __version__ = "1.0.0"
 __all__ = ["CellRepairTool", "create_cellrepair_tool"]
 
+
+def __getattr__(name):
+    # Defer importing LangChain until the tool is actually used
+    if name in __all__:
+        from . import cellrepair_langchain_tool
+        return getattr(cellrepair_langchain_tool, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,294 @@
+"""
+Shared HTTP plumbing for the CellRepair.AI LangChain tools.
+
+Both cellrepair_langchain and cellrepair_langchain_tool talk to the API
+through this module, so they share one connection pool and one client-side
+rate limit per process, and one async client and concurrency cap per event loop.
+"""
+
+from typing import Optional, Any, Callable, Dict, FrozenSet, Generic, List, Mapping, Tuple, TypeVar
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+import httpx
+import asyncio
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import weakref
+
+try:
+    import ijson
+except ImportError:  # streaming large responses is optional (pip install cellrepair-langchain[speed])
+    ijson = None
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+except ImportError:  # orjson is optional (pip install cellrepair-langchain[speed])
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    loads = json.loads
+
+
+T = TypeVar("T")
+
+
+# Transient failures worth retrying; anything else (401, other 4xx) returns at once
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+_MAX_RETRIES = 3
+_MAX_BACKOFF = 30.0
+
+
+class _CappedRetry(Retry):
+    """urllib3 Retry that never sleeps longer than _MAX_BACKOFF for a Retry-After header."""
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, _MAX_BACKOFF)
+
+
+def _retry_policy() -> Retry:
+    """Exponential backoff for the sync session, honouring Retry-After."""
+    kwargs = dict(
+        total=_MAX_RETRIES,
+        backoff_factor=1.0,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=frozenset(["POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    try:
+        return _CappedRetry(backoff_max=_MAX_BACKOFF, backoff_jitter=0.5, **kwargs)
+    except TypeError:
+        # urllib3 < 2 has neither option
+        return _CappedRetry(**kwargs)
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number ``attempt`` (0-based) of an async call."""
+    if retry_after:
+        try:
+            return min(_MAX_BACKOFF, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return min(_MAX_BACKOFF, (2 ** attempt) * (1 + random.random() * 0.5))
+
+
+# Shared default context for payloads; serialised only, never mutated
+EMPTY: Dict[str, Any] = {}
+
+# Inputs that never need a network round trip
+_MAX_QUERY_LEN = 8192
+_TRIVIAL_QUERIES = frozenset({"hi", "hello", "test", "ping"})
+_TRIVIAL_RESPONSE = (
+    "CellRepair.AI is ready. Ask a concrete question (e.g. how to scale or "
+    "coordinate your multi-agent system) to consult the agent network."
+)
+
+
+def preflight(query: str) -> Optional[str]:
+    """Return a canned reply for queries not worth an API call, else None."""
+    q = query.strip()
+    if not q:
+        return "Error: empty query"
+    if len(q) > _MAX_QUERY_LEN:
+        return f"Error: query exceeds {_MAX_QUERY_LEN} chars"
+    if q.lower() in _TRIVIAL_QUERIES:
+        return _TRIVIAL_RESPONSE
+    return None
+
+
+class TokenBucket:
+    """Client-side admission control: ``rate`` calls per ``per`` seconds, bursts up to ``burst``."""
+
+    def __init__(self, rate: float, per: float, burst: int):
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Take one token if available; never blocks."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+# Keeps a runaway agent loop from burning the free-tier quota (1000 calls/month);
+# one budget for the whole process, whichever tool class makes the call
+BUCKET = TokenBucket(rate=30, per=60.0, burst=10)
+RATE_LIMITED = json.dumps({"ok": False, "code": "agent.rate_limited"})
+
+
+USER_AGENT = "cellrepair-langchain/1.0.0"
+
+# Bodies at least this large are stream-parsed, keeping only the fields a tool formats
+_STREAM_MIN_BYTES = 8192
+
+
+def read_json(response: requests.Response, keep: FrozenSet[str]) -> Dict[str, Any]:
+    """Decode a ``stream=True`` response without buffering large bodies twice."""
+    length = response.headers.get("Content-Length")
+    if ijson is None or (length is not None and length.isdigit() and int(length) < _STREAM_MIN_BYTES):
+        return loads(response.content)
+    response.raw.decode_content = True
+    return {k: v for k, v in ijson.kvitems(response.raw, "", use_float=True) if k in keep}
+
+
+# Shared keep-alive pool: every tool call reuses the same TLS connection
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=100, max_retries=_retry_policy()))
+SESSION.headers["User-Agent"] = USER_AGENT
+
+
+def _env_concurrency(default: int = 20) -> int:
+    """CELLREPAIR_MAX_CONCURRENCY, falling back to ``default`` if unset or not a positive int."""
+    try:
+        value = int(os.getenv("CELLREPAIR_MAX_CONCURRENCY", default))
+    except ValueError:
+        return default
+    return value if value >= 1 else default
+
+
+# Cap on concurrent outbound requests, matching the keep-alive pool size
+_MAX_CONCURRENCY = _env_concurrency()
+
+
+class LoopLocal(Generic[T]):
+    """
+    One value per running event loop, built on first use in that loop.
+
+    Async state (clients, semaphores, futures) belongs to the loop that made it,
+    and asyncio.run() starts a fresh loop each time, so it is kept per loop and
+    released together with the loop. Copies and pickles start out empty, so
+    objects holding a LoopLocal stay copyable.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._values: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T]" = weakref.WeakKeyDictionary()
+
+    def get(self, factory: Callable[[], T]) -> T:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._values.get(loop)
+            if value is None:
+                value = self._values[loop] = factory()
+            return value
+
+    def discard(self) -> None:
+        """Forget the running loop's value so the next get() builds a new one."""
+        with self._lock:
+            self._values.pop(asyncio.get_running_loop(), None)
+
+    def values(self) -> List[T]:
+        with self._lock:
+            return list(self._values.values())
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "LoopLocal[T]":
+        return type(self)()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), ()
+
+
+_ASYNC_CLIENTS: "LoopLocal[httpx.AsyncClient]" = LoopLocal()
+_SEMAPHORES: "LoopLocal[asyncio.Semaphore]" = LoopLocal()
+
+
+def _default_semaphore() -> asyncio.Semaphore:
+    """Return the running loop's shared concurrency limit, created on first use."""
+    return _SEMAPHORES.get(lambda: asyncio.Semaphore(_MAX_CONCURRENCY))
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    # HTTP/2 multiplexes concurrent calls over one connection;
+    # httpx negotiates it via ALPN and falls back to HTTP/1.1
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        timeout=30.0,
+        headers={"User-Agent": USER_AGENT}
+    )
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the running loop's AsyncClient, creating it on first use."""
+    client = _ASYNC_CLIENTS.get(_new_async_client)
+    if client.is_closed:
+        _ASYNC_CLIENTS.discard()
+        client = _ASYNC_CLIENTS.get(_new_async_client)
+    return client
+
+
+async def apost(
+    url: str,
+    headers: Mapping[str, str],
+    payload: Dict[str, Any],
+    limit: Optional[asyncio.Semaphore] = None
+) -> httpx.Response:
+    """
+    POST via the shared AsyncClient, retrying transient failures with backoff.
+
+    Each attempt holds ``limit`` (default: the shared per-loop semaphore) while
+    on the wire; backoff sleeps do not.
+    """
+    client = _get_async_client()
+    sem = limit or _default_semaphore()
+    body = dumps(payload)
+    for attempt in range(_MAX_RETRIES + 1):
+        last = attempt == _MAX_RETRIES
+        try:
+            async with sem:
+                response = await client.post(url, headers=headers, content=body)
+        except (httpx.ConnectError, httpx.TimeoutException):
+            if last:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+
+        if last or response.status_code not in _RETRY_STATUSES:
+            return response
+        await asyncio.sleep(_backoff_delay(attempt, response.headers.get("Retry-After")))
+
+
+async def apost_json(
+    url: str,
+    headers: Mapping[str, str],
+    payload: Dict[str, Any],
+    limit: Optional[asyncio.Semaphore] = None
+) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """POST a single query; returns (status_code, decoded body on 200 else None)."""
+    response = await apost(url, headers, payload, limit)
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, loads(response.content)
+
+
+@atexit.register
+def _close_async_clients() -> None:
+    for client in _ASYNC_CLIENTS.values():
+        if not client.is_closed:
+            try:
+                asyncio.run(client.aclose())
+            except Exception:
+                # The client's own loop is gone; its sockets close with the process
+                pass
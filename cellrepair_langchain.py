@@ -5,13 +5,93 @@ Makes it TRIVIAL for LangChain users to use CellRepair.AI!
 = 100,000+ Developers get instant access!
 """
 
-from typing import Optional, Type, Any, Dict
+from typing import Optional, Type, Any, Dict, NamedTuple, Sequence
+from functools import lru_cache, partial
 from langchain.tools import BaseTool
-from langchain.callbacks.manager import CallbackManagerForToolRun
-from pydantic import BaseModel, Field
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from pydantic import BaseModel, Field, PrivateAttr
 import requests
+import httpx
+import asyncio
+import operator
 import os
 
+try:
+    from ._cellrepair_http import (
+        BUCKET, EMPTY, RATE_LIMITED, SESSION, LoopLocal, apost, loads, dumps, preflight, read_json
+    )
+except ImportError:  # imported as a top-level module rather than from the package
+    from _cellrepair_http import (
+        BUCKET, EMPTY, RATE_LIMITED, SESSION, LoopLocal, apost, loads, dumps, preflight, read_json
+    )
+
+# Top-level response fields this tool formats; everything else is skipped when streaming
+_KEEP_KEYS = frozenset(('insight', 'agents_consulted', 'predictive_intelligence', 'learning_exchange'))
+
+
+@lru_cache(maxsize=256)
+def _format_confidence(confidence: float) -> str:
+    """Render a 0..1 confidence score as a percentage."""
+    return f"{confidence*100:.0f}%"
+
+
+class _Resp(NamedTuple):
+    """The parts of an API response the tool actually shows."""
+    recommendation: str
+    confidence: float
+    agents: Any
+    next_questions: Sequence[str]
+    both_improved: bool
+
+
+_GET_TOP = operator.itemgetter('insight', 'agents_consulted')
+_GET_INSIGHT = operator.itemgetter('recommendation', 'confidence')
+
+
+def _decode(data: Dict[str, Any]) -> _Resp:
+    """Pull the displayed fields out of a response in one pass."""
+    insight, agents = _GET_TOP(data)
+    recommendation, confidence = _GET_INSIGHT(insight)
+    predictive = data.get('predictive_intelligence') or EMPTY
+    learn = data.get('learning_exchange') or EMPTY
+    return _Resp(
+        str(recommendation),
+        confidence,
+        agents,
+        predictive.get('you_will_probably_ask_next') or (),
+        bool(learn.get('both_systems_improved'))
+    )
+
+
+def _format_response(data: Dict[str, Any]) -> str:
+    """Format an API response for the agent."""
+    r = _decode(data)
+    lines = [
+        "CellRepair.AI Network Response:",
+        "",
+        r.recommendation,
+        "",
+        "Confidence: " + _format_confidence(r.confidence),
+        f"Agents consulted: {r.agents}",
+    ]
+
+    # Add predictive insights
+    if r.next_questions:
+        lines.append("")
+        lines.append("You'll probably ask next:")
+        lines.extend(f"  {i}. {q}" for i, q in enumerate(r.next_questions, 1))
+
+    # Add learning info
+    if r.both_improved:
+        lines.append("")
+        lines.append("✨ Both LangChain and CellRepair.AI got smarter from this!")
+
+    lines.append("")
+    return "\n".join(lines)
+
 
 class CellRepairInput(BaseModel):
     """Input for CellRepair AI Collaboration tool."""
@@ -52,15 +132,31 @@ class CellRepairAITool(BaseTool):
     api_key: str = Field(default="")
     api_url: str = "https://cellrepair.ai/api/v1/collaborate"
 
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
+
+    _headers: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _semaphores: "LoopLocal[asyncio.Semaphore]" = PrivateAttr(default_factory=LoopLocal)
+
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """Initialize with API key."""
         super().__init__(**kwargs)
         self.api_key = api_key or os.getenv("CELLREPAIR_API_KEY", "")
+        # Built once and shared by every call this instance makes; never mutated
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
 
         if not self.api_key:
             print("⚠️  No API key provided. Get one at: https://cellrepair.ai/api/")
             print("   Free tier: 1000 calls/month!")
 
+    def _limit(self) -> Optional[asyncio.Semaphore]:
+        """Per-instance concurrency cap, if max_concurrency was given."""
+        if self.max_concurrency is None:
+            return None
+        return self._semaphores.get(partial(asyncio.Semaphore, self.max_concurrency))
+
     def _run(
         self,
         query: str,
@@ -68,22 +164,70 @@ class CellRepairAITool(BaseTool):
     ) -> str:
         """Use the CellRepair.AI network."""
 
+        rejected = preflight(query)
+        if rejected is not None:
+            return rejected
+        query = query.strip()
+
         if not self.api_key:
             return "Error: No API key. Get free key at https://cellrepair.ai/api/ (1000 calls/month free!)"
 
+        if not BUCKET.acquire():
+            return RATE_LIMITED
+
         try:
-            response = requests.post(
+            with SESSION.post(
                 self.api_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
+                headers=self._headers,
+                data=dumps({
+                    "system": "LangChain",
+                    "query": query,
+                    "context": EMPTY
+                }),
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 401:
+                    return "Error: Invalid API key. Get one at https://cellrepair.ai/api/"
+
+                if response.status_code != 200:
+                    return f"Error: API returned {response.status_code}"
+
+                return _format_response(read_json(response, _KEEP_KEYS))
+
+        except requests.exceptions.Timeout:
+            return "Error: Request timed out. Try again."
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    async def _arun(
+        self,
+        query: str,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        """Use the CellRepair.AI network without blocking the event loop."""
+
+        rejected = preflight(query)
+        if rejected is not None:
+            return rejected
+        query = query.strip()
+
+        if not self.api_key:
+            return "Error: No API key. Get free key at https://cellrepair.ai/api/ (1000 calls/month free!)"
+
+        if not BUCKET.acquire():
+            return RATE_LIMITED
+
+        try:
+            response = await apost(
+                self.api_url,
+                self._headers,
+                {
                     "system": "LangChain",
                     "query": query,
-                    "context": {}
+                    "context": EMPTY
                 },
-                timeout=30
+                self._limit()
             )
 
             if response.status_code == 401:
@@ -92,45 +236,13 @@ class CellRepairAITool(BaseTool):
             if response.status_code != 200:
                 return f"Error: API returned {response.status_code}"
 
-            data = response.json()
-
-            # Format response
-            result = f"CellRepair.AI Network Response:\n\n"
-            result += f"{data['insight']['recommendation']}\n\n"
-            result += f"Confidence: {data['insight']['confidence']*100:.0f}%\n"
-            result += f"Agents consulted: {data['agents_consulted']}\n"
+            return _format_response(loads(response.content))
 
-            # Add predictive insights
-            if 'predictive_intelligence' in data:
-                next_q = data['predictive_intelligence'].get('you_will_probably_ask_next', [])
-                if next_q:
-                    result += f"\nYou'll probably ask next:\n"
-                    for i, q in enumerate(next_q, 1):
-                        result += f"  {i}. {q}\n"
-
-            # Add learning info
-            if 'learning_exchange' in data:
-                learn = data['learning_exchange']
-                if learn.get('both_systems_improved'):
-                    result += f"\n✨ Both LangChain and CellRepair.AI got smarter from this!\n"
-
-            return result
-
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return "Error: Request timed out. Try again."
         except Exception as e:
             return f"Error: {str(e)}"
 
-    async def _arun(
-        self,
-        query: str,
-        run_manager: Optional[CallbackManagerForToolRun] = None,
-    ) -> str:
-        """Async version."""
-        # For now, just call sync version
-        # TODO: Implement proper async
-        return self._run(query, run_manager)
-
 
 # Convenience function for quick setup
 def get_cellrepair_tool(api_key: Optional[str] = None) -> CellRepairAITool:
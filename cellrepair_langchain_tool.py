@@ -11,18 +11,251 @@ Usage:
     result = tool.run("How to optimize multi-agent coordination?")
 """
 
-from typing import Optional, Type, Any
+from typing import Optional, Type, Any, Dict, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
+from functools import partial
 from langchain.tools import BaseTool
-from langchain.callbacks.manager import CallbackManagerForToolRun
-from pydantic import BaseModel, Field
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from pydantic import BaseModel, Field, PrivateAttr
+from cachetools import TTLCache
 import requests
+import httpx
+import asyncio
+import hashlib
+import json
 import os
+import threading
+
+try:
+    from ._cellrepair_http import (
+        BUCKET, EMPTY, RATE_LIMITED, SESSION, LoopLocal, apost, apost_json, dumps, loads, preflight, read_json
+    )
+except ImportError:  # imported as a top-level module rather than from the package
+    from _cellrepair_http import (
+        BUCKET, EMPTY, RATE_LIMITED, SESSION, LoopLocal, apost, apost_json, dumps, loads, preflight, read_json
+    )
+
+# Top-level response fields this tool formats; everything else is skipped when streaming
+_KEEP_KEYS = frozenset(('insight', 'agents_consulted', 'predictive_intelligence'))
+
+
+# Batches are grouped by endpoint, Authorization value and concurrency limit
+_BatchKey = Tuple[str, str, Optional[asyncio.Semaphore]]
+
+# Endpoints that answered batch_not_supported; shared by every loop's _Batcher
+_NO_BATCH: Set[str] = set()
+
+
+class _Batcher:
+    """
+    Coalesces concurrent async queries into one batched POST.
+
+    Queries for the same endpoint, API key and concurrency limit are collected
+    for up to ``max_wait`` seconds (or until ``max_size`` are queued) and sent
+    as one POST. Each caller's future resolves to the same (status_code, data)
+    pair apost_json returns.
+
+    Assumed wire contract: the request body is
+    ``{"system": "LangChain", "batch": [{"query": ..., "context": ...}, ...]}``
+    and a 200 answer is ``{"results": [...]}`` holding one single-query response
+    per item, in request order. Any other status applies to every query in the
+    batch. An endpoint that answers ``400 batch_not_supported`` is remembered
+    in _NO_BATCH and gets its queries one by one from then on.
+
+    Pending queries, timers and futures belong to one event loop, so each loop
+    has its own _Batcher (see _BATCHERS).
+    """
+
+    def __init__(self, max_wait: float = 0.02, max_size: int = 8):
+        self.max_wait = max_wait
+        self.max_size = max_size
+        self._pending: Dict[_BatchKey, List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._headers: Dict[_BatchKey, Mapping[str, str]] = {}
+        self._timers: Dict[_BatchKey, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+
+    def submit(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        limit: Optional[asyncio.Semaphore],
+        item: Dict[str, Any],
+        fut: asyncio.Future
+    ) -> None:
+        key = (url, headers['Authorization'], limit)
+        queue = self._pending.setdefault(key, [])
+        queue.append((item, fut))
+        self._headers[key] = headers
+
+        if len(queue) >= self.max_size:
+            self._flush(key)
+        elif len(queue) == 1:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+    def _flush(self, key: _BatchKey) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(key[0], self._headers.pop(key), key[2], batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        limit: Optional[asyncio.Semaphore],
+        batch: List[Tuple[Dict[str, Any], asyncio.Future]]
+    ) -> None:
+        try:
+            if len(batch) > 1 and url not in _NO_BATCH:
+                response = await apost(url, headers, {
+                    'system': 'LangChain',
+                    'batch': [item for item, _ in batch]
+                }, limit)
+                if response.status_code == 400 and b'batch_not_supported' in response.content:
+                    _NO_BATCH.add(url)
+                elif response.status_code != 200:
+                    for _, fut in batch:
+                        if not fut.done():
+                            fut.set_result((response.status_code, None))
+                    return
+                else:
+                    results = loads(response.content)['results']
+                    if len(results) != len(batch):
+                        raise ValueError(f"batch returned {len(results)} results for {len(batch)} queries")
+                    for (_, fut), data in zip(batch, results):
+                        if not fut.done():
+                            fut.set_result((200, data))
+                    return
+
+            singles = [apost_json(url, headers, {'system': 'LangChain', **item}, limit) for item, _ in batch]
+            outcomes = await asyncio.gather(*singles, return_exceptions=True)
+            for (_, fut), outcome in zip(batch, outcomes):
+                if fut.done():
+                    continue
+                if isinstance(outcome, BaseException):
+                    fut.set_exception(outcome)
+                else:
+                    fut.set_result(outcome)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+
+
+_BATCHERS: "LoopLocal[_Batcher]" = LoopLocal()
+
+
+# Formatted results of recent successful calls, keyed by _cache_key()
+_RESP_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_RESP_CACHE_LOCK = threading.Lock()
+
+
+def _cache_key(endpoint: str, authorization: str, query: str, context: Any) -> Optional[bytes]:
+    """
+    Hash a call's endpoint, credentials, query and context; context is canonicalised
+    so key order doesn't matter. Returns None when it has no canonical form
+    (e.g. a dict mixing str and int keys), in which case the call is not shared.
+    """
+    try:
+        canonical = json.dumps(context or EMPTY, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(
+        "\0".join((endpoint, authorization, query, canonical)).encode(), digest_size=16
+    ).digest()
+
+
+class _Flight:
+    """
+    A sync call in progress; followers wait on ``event`` and read ``result``.
+    """
+
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = "Error: Request failed. Please try again."
+
+
+# Calls currently on the wire, keyed like the cache (zero TTL: dropped on completion);
+# async futures belong to one event loop, so each loop gets its own table
+_INFLIGHT: "LoopLocal[Dict[bytes, asyncio.Future]]" = LoopLocal()
+_INFLIGHT_SYNC: Dict[bytes, _Flight] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+class _Resp(NamedTuple):
+    """
+    The parts of an API response the tool actually shows.
+    """
+    recommendation: str
+    confidence: float
+    agents: Any
+    implementation_time: Any
+    roi_estimate: Any
+    next_questions: Sequence[str]
+
+
+def _decode(data: Dict[str, Any]) -> _Resp:
+    """
+    Pull the displayed fields out of a response in one pass, applying defaults.
+    """
+    insight = data.get('insight', EMPTY)
+    get = insight.get
+    return _Resp(
+        str(get('recommendation', 'No recommendation available')),
+        get('confidence', 0),
+        data.get('agents_consulted', 0),
+        get('implementation_time', 'Unknown'),
+        get('roi_estimate', 'Unknown'),
+        data.get('predictive_intelligence', EMPTY).get('you_will_probably_ask_next') or ()
+    )
+
+
+_TEMPLATE = (
+    "CellRepair.AI Analysis:\n\n"
+    "{rec}\n\n"
+    "Confidence: {conf:.1f}%\n"
+    "Agents Consulted: {agents}\n"
+    "Implementation Time: {impl}\n"
+    "ROI Estimate: {roi}"
+)
+
+
+def _format_response(data: Dict[str, Any]) -> str:
+    """
+    Format an API response for LangChain.
+    """
+    r = _decode(data)
+    result = _TEMPLATE.format_map({
+        'rec': r.recommendation,
+        'conf': r.confidence * 100,
+        'agents': r.agents,
+        'impl': r.implementation_time,
+        'roi': r.roi_estimate
+    })
+
+    # Include predictive intelligence if available
+    if r.next_questions:
+        lines = [result, "", "", "Predictive Intelligence (3 steps ahead):"]
+        lines.extend(f"  {i}. {q}" for i, q in enumerate(r.next_questions, 1))
+        result = "\n".join(lines)
+
+    return result.strip()
 
 
 class CellRepairInput(BaseModel):
     """Input for CellRepair AI collaboration."""
     query: str = Field(description="Your question or problem to solve")
-    context: Optional[dict] = Field(
+    # Any, not dict: contexts can be large nested metrics, and the server validates them
+    context: Any = Field(
         default=None,
         description="Optional context information (e.g., current metrics, tech stack)"
     )
@@ -61,6 +294,19 @@ class CellRepairTool(BaseTool):
 
     api_key: str = Field(default="")
     api_endpoint: str = Field(default="https://cellrepair.ai/api/v1/collaborate")
+    cache: bool = Field(default=True, description="Reuse results of identical recent queries")
+    batch_requests: bool = Field(
+        default=False,
+        description="Coalesce concurrent async queries into batched requests"
+    )
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Max in-flight async requests for this instance (default: CELLREPAIR_MAX_CONCURRENCY, 20)"
+    )
+
+    _headers: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _semaphores: "LoopLocal[asyncio.Semaphore]" = PrivateAttr(default_factory=LoopLocal)
 
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """
@@ -69,6 +315,10 @@ class CellRepairTool(BaseTool):
         Args:
             api_key: Your CellRepair API key. Get one at https://cellrepair.ai/api/
                     If not provided, will look for CELLREPAIR_API_KEY env variable.
+            cache: Set to False to always hit the API (e.g. for non-deterministic queries).
+            batch_requests: Set to True to send concurrent async queries as one batched request.
+            max_concurrency: Cap in-flight async requests for this instance instead of
+                    sharing the CELLREPAIR_MAX_CONCURRENCY limit.
         """
         if api_key is None:
             api_key = os.getenv('CELLREPAIR_API_KEY', '')
@@ -81,72 +331,195 @@ class CellRepairTool(BaseTool):
                 "Or set CELLREPAIR_API_KEY environment variable."
             )
 
+        # Built once and shared by every call this instance makes; never mutated
+        self._headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+
+    def _limit(self) -> Optional[asyncio.Semaphore]:
+        """
+        Per-instance concurrency cap, if max_concurrency was given.
+        """
+        if self.max_concurrency is None:
+            return None
+        return self._semaphores.get(partial(asyncio.Semaphore, self.max_concurrency))
+
+    def _parse_input(
+        self, tool_input: Union[str, Dict], *args: Any, **kwargs: Any
+    ) -> Union[str, Dict[str, Any]]:
+        """
+        Skip pydantic validation for input that already has the schema's shape.
+
+        A plain string is the query itself, and a dict holding a string query
+        plus an optional (unvalidated) context is exactly what CellRepairInput
+        would produce. Anything else goes through the regular validation.
+        """
+        if isinstance(tool_input, str):
+            return tool_input
+        if (
+            isinstance(tool_input, dict)
+            and isinstance(tool_input.get('query'), str)
+            and tool_input.keys() <= {'query', 'context'}
+        ):
+            return tool_input
+        return super()._parse_input(tool_input, *args, **kwargs)
+
     def _run(
         self,
         query: str,
-        context: Optional[dict] = None,
+        context: Any = None,
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> str:
         """
         Execute collaboration with CellRepair.AI network.
         """
+        rejected = preflight(query)
+        if rejected is not None:
+            return rejected
+        query = query.strip()
+
+        key = _cache_key(self.api_endpoint, self._headers['Authorization'], query, context)
+        if key is None:
+            return self._fetch(query, context, None)
+        if self.cache:
+            with _RESP_CACHE_LOCK:
+                cached = _RESP_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+        # Single-flight: identical concurrent calls wait for the first one
+        with _INFLIGHT_LOCK:
+            flight = _INFLIGHT_SYNC.get(key)
+            leader = flight is None
+            if leader:
+                flight = _INFLIGHT_SYNC[key] = _Flight()
+        if not leader:
+            flight.event.wait()
+            return flight.result
+
         try:
-            # Prepare request
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
+            flight.result = self._fetch(query, context, key)
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT_SYNC.pop(key, None)
+            flight.event.set()
+        return flight.result
+
+    def _fetch(self, query: str, context: Any, key: Optional[bytes]) -> str:
+        """
+        Call the API and format the answer; only ever runs once per in-flight key.
+        """
+        if not BUCKET.acquire():
+            return RATE_LIMITED
 
+        try:
+            # Prepare request
             payload = {
                 'system': 'LangChain',
                 'query': query,
-                'context': context or {}
+                'context': context or EMPTY
             }
 
             # Make API call
-            response = requests.post(
+            with SESSION.post(
                 self.api_endpoint,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-
-            if response.status_code == 401:
-                return "Error: Invalid API key. Get a free key at https://cellrepair.ai/api/?utm_source=langchain"
-
-            if response.status_code != 200:
-                return f"Error: API returned status {response.status_code}"
-
-            data = response.json()
-
-            # Format response for LangChain
-            insight = data.get('insight', {})
-            recommendation = insight.get('recommendation', 'No recommendation available')
-            confidence = insight.get('confidence', 0)
-            agents = data.get('agents_consulted', 0)
+                headers=self._headers,
+                data=dumps(payload),
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 401:
+                    return "Error: Invalid API key. Get a free key at https://cellrepair.ai/api/?utm_source=langchain"
+
+                if response.status_code != 200:
+                    return f"Error: API returned status {response.status_code}"
+
+                result = _format_response(read_json(response, _KEEP_KEYS))
+                if self.cache and key is not None:
+                    with _RESP_CACHE_LOCK:
+                        _RESP_CACHE[key] = result
+                return result
 
-            # Include predictive intelligence if available
-            predictive = data.get('predictive_intelligence', {})
-            next_questions = predictive.get('you_will_probably_ask_next', [])
-
-            result = f"""CellRepair.AI Analysis:
+        except requests.exceptions.Timeout:
+            return "Error: Request timed out. Please try again."
+        except Exception as e:
+            return f"Error: {str(e)}"
 
-{recommendation}
+    async def _arun(
+        self,
+        query: str,
+        context: Any = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        """
+        Execute collaboration with CellRepair.AI network without blocking the event loop.
+        """
+        rejected = preflight(query)
+        if rejected is not None:
+            return rejected
+        query = query.strip()
+
+        key = _cache_key(self.api_endpoint, self._headers['Authorization'], query, context)
+        if key is None:
+            return await self._afetch(query, context, None)
+        if self.cache:
+            with _RESP_CACHE_LOCK:
+                cached = _RESP_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+        # Single-flight: identical concurrent calls await the first one's future
+        inflight = _INFLIGHT.get(dict)
+        leader = inflight.get(key)
+        if leader is not None:
+            return await asyncio.shield(leader)
+
+        fut = asyncio.get_running_loop().create_future()
+        inflight[key] = fut
+        try:
+            fut.set_result(await self._afetch(query, context, key))
+        finally:
+            inflight.pop(key, None)
+            if not fut.done():
+                fut.set_result("Error: Request was cancelled. Please try again.")
+        return fut.result()
+
+    async def _afetch(self, query: str, context: Any, key: Optional[bytes]) -> str:
+        """
+        Async counterpart of _fetch.
+        """
+        if not BUCKET.acquire():
+            return RATE_LIMITED
 
-Confidence: {confidence*100:.1f}%
-Agents Consulted: {agents}
-Implementation Time: {insight.get('implementation_time', 'Unknown')}
-ROI Estimate: {insight.get('roi_estimate', 'Unknown')}
-"""
+        try:
+            if self.batch_requests:
+                fut = asyncio.get_running_loop().create_future()
+                _BATCHERS.get(_Batcher).submit(self.api_endpoint, self._headers, self._limit(), {
+                    'query': query,
+                    'context': context or EMPTY
+                }, fut)
+                status, data = await fut
+            else:
+                status, data = await apost_json(self.api_endpoint, self._headers, {
+                    'system': 'LangChain',
+                    'query': query,
+                    'context': context or EMPTY
+                }, self._limit())
+
+            if status == 401:
+                return "Error: Invalid API key. Get a free key at https://cellrepair.ai/api/?utm_source=langchain"
 
-            if next_questions:
-                result += f"\n\nPredictive Intelligence (3 steps ahead):\n"
-                for i, q in enumerate(next_questions, 1):
-                    result += f"  {i}. {q}\n"
+            if status != 200:
+                return f"Error: API returned status {status}"
 
-            return result.strip()
+            result = _format_response(data)
+            if self.cache and key is not None:
+                with _RESP_CACHE_LOCK:
+                    _RESP_CACHE[key] = result
+            return result
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return "Error: Request timed out. Please try again."
         except Exception as e:
             return f"Error: {str(e)}"
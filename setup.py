@@ -31,8 +31,13 @@ setup(
         "langchain>=0.1.0",
         "langchain-core>=0.1.0",
         "requests>=2.25.0",
+        "httpx[http2]>=0.24.0",
+        "cachetools>=5.0.0",
         "pydantic>=2.0.0",
     ],
+    extras_require={
+        "speed": ["orjson>=3.8.0", "ijson>=3.1", "brotli>=1.0"],
+    },
     keywords=[
         "langchain",
         "ai",